@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Unix socket daemon for the AI Insights Engine
+Keeps one engine (and numpy/pandas) loaded between requests so callers skip interpreter start-up.
+Every frame is a 4-byte little-endian length followed by that many bytes of JSON. On connect the daemon
+sends {"engineVersion": ...} for the engine it loaded; after that each request carries transaction data
+and each response the analyze_transactions result. A daemon whose engine file has changed on disk since
+it started shuts down instead of answering, so clients never get results from stale code. The default
+socket path is per user and per engine checkout, so daemons for different trees never meet.
+
+Usage: python ai_daemon.py [socket_path]
+"""
+
+import hashlib
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import ai_insights_engine
+from ai_insights_engine import _import_numeric_stack, dump_json, engine_version, get_engine, loads_json
+
+def default_socket_path() -> str:
+    """Socket path for this user and this engine checkout, in the user's runtime dir when there is one"""
+    engine_path = os.path.abspath(ai_insights_engine.__file__)
+    checkout = hashlib.blake2b(engine_path.encode(), digest_size=8).hexdigest()
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f'ai_engine-{os.getuid()}-{checkout}.sock')
+
+SOCKET_PATH = default_socket_path()
+HEADER = struct.Struct('<I')
+STARTUP_TIMEOUT = 30  # Seconds to wait for a freshly spawned daemon to accept connections
+ENGINE_VERSION = engine_version()  # The engine this process loaded
+
+def recv_frame(conn: socket.socket) -> Optional[bytearray]:
+    """Read one length-prefixed frame, or None if the peer closed the connection between frames"""
+    header = conn.recv(HEADER.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise ConnectionError('Connection closed inside a frame header')
+    
+    (size,) = HEADER.unpack(header)
+    payload = bytearray(size)
+    view = memoryview(payload)
+    received = 0
+    while received < size:
+        chunk = conn.recv_into(view[received:])
+        if not chunk:
+            raise ConnectionError('Connection closed inside a frame')
+        received += chunk
+    return payload
+
+def send_frame(conn: socket.socket, payload: Any) -> None:
+    """Write one length-prefixed frame; payload is any bytes-like object (bytes, memoryview, mmap)"""
+    conn.sendall(HEADER.pack(len(payload)))
+    conn.sendall(payload)
+
+def handle(conn: socket.socket) -> None:
+    """Announce the loaded engine version, then answer requests until the client closes the connection"""
+    with conn:
+        send_frame(conn, dump_json({'engineVersion': ENGINE_VERSION}))
+        while True:
+            request = recv_frame(conn)
+            if request is None:
+                return
+            
+            # Unreadable JSON comes back as a failed result, like any other analysis error
+            send_frame(conn, dump_json(get_engine().analyze_transactions(request)))
+
+def serve(path: str = SOCKET_PATH) -> None:
+    """Bind the socket and answer connections one at a time, forever"""
+    # Load everything up front so the first request is as fast as the rest
+    _import_numeric_stack()
+    get_engine()
+    
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        try:
+            server.bind(path)
+        except OSError:
+            # The path exists: leave a live daemon alone, replace a stale socket file
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                if probe.connect_ex(path) == 0:
+                    return
+            os.unlink(path)
+            server.bind(path)
+        
+        server.listen()
+        # Turn `kill` into a normal exit so the socket file is removed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            while True:
+                conn, _ = server.accept()
+                if engine_version() != ENGINE_VERSION:
+                    break  # The engine file changed since this daemon loaded it
+                
+                try:
+                    handle(conn)
+                except ConnectionError:
+                    pass  # A client went away mid-request; keep serving the others
+        finally:
+            os.unlink(path)
+        
+        # Drop the client only once the path is free, so its retry can start a fresh daemon
+        conn.close()
+
+def connect(path: str = SOCKET_PATH) -> Tuple[socket.socket, str]:
+    """
+    Connect to a daemon running the engine currently on disk, starting one in the background if needed.
+    Returns the connection and the engine version the daemon reported.
+    """
+    daemon = None
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            listening = False
+        else:
+            listening = True
+            try:
+                hello = recv_frame(conn)
+                if hello is not None:
+                    version = loads_json(hello)['engineVersion']
+                    if version == engine_version():
+                        return conn, version
+            except ConnectionError:
+                pass  # An outdated daemon shutting down
+        conn.close()
+        
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'No AI engine daemon running {engine_version()} is listening on {path}')
+        # Start a daemon only when nothing listens on the path: an outdated daemon there frees it on its own
+        # once it sees the engine changed, and a second daemon could not bind it anyway
+        if not listening and (daemon is None or daemon.poll() is not None):
+            daemon = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), path],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+        time.sleep(0.05)
+
+def analyze_remote(conn: socket.socket, payload: Any) -> Dict[str, Any]:
+    """Send raw transaction JSON to the daemon and return its analysis result"""
+    send_frame(conn, payload)
+    response = recv_frame(conn)
+    if response is None:
+        raise ConnectionError('AI engine daemon closed the connection')
+    
+    result = loads_json(response)
+    if 'success' not in result:
+        raise ValueError(result.get('error', 'AI engine daemon returned no result'))
+    return result
+
+if __name__ == '__main__':
+    serve(sys.argv[1] if len(sys.argv) > 1 else SOCKET_PATH)
@@ -4,14 +4,32 @@ Independent AI Insights Service for SmartFinance
 This service provides AI-powered financial insights without relying on external services.
 """
 
+from __future__ import annotations
+
+import codecs
+import heapq
 import json
+import os
 import sys
-import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from collections import defaultdict
-import statistics
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple, Union, Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = pd = None  # Imported on first use by _import_numeric_stack()
+
+def _import_numeric_stack() -> None:
+    """Import numpy and pandas on first use; the demo insights path never needs them"""
+    global np, pd
+    if pd is None:
+        import numpy as np
+        import pandas as pd
 
 class FinancialAIInsights:
     def __init__(self):
@@ -23,44 +41,77 @@ class FinancialAIInsights:
         Main method to analyze transactions and generate insights
         """
         try:
-            # Handle both string and list inputs for backward compatibility
-            if isinstance(transactions_data, str):
-                transactions = json.loads(transactions_data)
+            # Handle JSON text or bytes (any buffer) and already-parsed list inputs; unreadable JSON
+            # fails like any other analysis error
+            if isinstance(transactions_data, (str, bytes, bytearray, memoryview)):
+                transactions = loads_json(transactions_data)
             else:
                 transactions = transactions_data
             
             if not transactions:
                 return self.get_demo_insights()
             
-            # Convert to pandas DataFrame for easier analysis
-            df = pd.DataFrame(transactions)
-            df['date'] = pd.to_datetime(df['date'])
-            df['amount'] = pd.to_numeric(df['amount'])
+            _import_numeric_stack()
             
-            # Ensure timezone consistency
-            if df['date'].dt.tz is None:
-                df['date'] = df['date'].dt.tz_localize('UTC')
-            else:
-                df['date'] = df['date'].dt.tz_convert('UTC')
+            # Convert to pandas DataFrame for easier analysis, building only the columns the analyzers use.
+            # Dates are normalized once to naive UTC datetime64[ns] (analyzers never re-check timezones) and
+            # low-cardinality string keys become categoricals, so grouping and matching work on integer codes.
+            df = pd.DataFrame({
+                'amount': np.array([t['amount'] for t in transactions], dtype=np.float64),
+                'date': pd.to_datetime([t['date'] for t in transactions], utc=True).values.astype('datetime64[ns]'),
+                'merchant': pd.Categorical([t.get('merchant') for t in transactions]),
+                'category': pd.Categorical([t.get('category') for t in transactions])
+            }, copy=False)
+            
+            # Split out expenses (negative amounts) once and share them with every analyzer
+            amounts = df['amount'].values
+            expense_mask = amounts < 0
+            expenses = df.loc[expense_mask].copy()
+            expenses['amount'] = -expenses['amount'].values
+            
+            expense_amounts = expenses['amount'].to_numpy(dtype=np.float64, copy=False)
+            income_sum = amounts[amounts > 0].sum()  # Missing (NaN) amounts are neither income nor expense
+            expense_sum = expense_amounts.sum()
+            
+            # Day and month buckets for every expense, derived once from the raw timestamps
+            expense_days = expenses['date'].values.astype('datetime64[D]')
+            expense_months = expenses['date'].values.astype('datetime64[M]')
+            
+            # Daily and monthly spending totals (chronological), shared by every analyzer that needs them.
+            # Undated expenses are left out, as groupby drops NaT keys; np.unique would keep NaT as a bucket.
+            dated = ~np.isnat(expense_days)
+            dated_amounts = expense_amounts[dated]
+            day_keys, day_index = np.unique(expense_days[dated], return_inverse=True)
+            daily_totals = np.bincount(day_index, weights=dated_amounts, minlength=day_keys.size)
+            month_keys, month_index = np.unique(expense_months[dated], return_inverse=True)
+            monthly_totals = np.bincount(month_index, weights=dated_amounts, minlength=month_keys.size)
+            
+            # Build the shared category grouping once
+            cat_gb = expenses.groupby('category', sort=False, observed=True)
+            
+            # Recurring charges feed both the subscription and new-charge insights
+            recurring_charges = self.find_recurring_charges(expenses, expense_days)
             
             insights = []
             
             # Generate various types of insights
-            insights.extend(self.analyze_spending_patterns(df))
-            insights.extend(self.detect_anomalies(df))
-            insights.extend(self.predict_future_spending(df))
-            insights.extend(self.identify_savings_opportunities(df))
-            insights.extend(self.analyze_cash_flow(df))
-            insights.extend(self.detect_recurring_charges(df))
+            insights.extend(self.analyze_spending_patterns(df, expenses))
+            insights.extend(self.detect_anomalies(df, expenses, day_keys, daily_totals))
+            insights.extend(self.predict_future_spending(df, expenses, monthly_totals))
+            insights.extend(self.identify_savings_opportunities(df, expenses, cat_gb, recurring_charges))
+            insights.extend(self.analyze_cash_flow(income_sum, expense_sum))
+            insights.extend(self.detect_recurring_charges(df, expenses, recurring_charges))
             
             # Calculate financial health score
-            health_score = self.calculate_health_score(df)
+            health_score = self.calculate_health_score(
+                expense_amounts, daily_totals, monthly_totals, income_sum, expense_sum
+            )
             
-            # Sort insights by priority and confidence
-            insights.sort(key=lambda x: (x['priority'], x['confidence']), reverse=True)
+            # Keep the top 8 insights by priority and confidence
+            top_insights = heapq.nlargest(8, insights, key=lambda x: (x['priority'], x['confidence']))
             
             return {
-                'insights': insights[:8],  # Top 8 insights
+                'insights': top_insights,
                 'healthScore': health_score,
                 'success': True
             }
@@ -73,35 +124,34 @@ class FinancialAIInsights:
                 'error': str(e)
             }
     
-    def analyze_spending_patterns(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def analyze_transactions_batch(self, batch: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Analyze several independent transaction lists with one engine, returning results in order"""
+        return [self.analyze_transactions(transactions_data) for transactions_data in batch]
+    
+    def analyze_spending_patterns(self, df: pd.DataFrame, expenses: pd.DataFrame) -> List[Dict[str, Any]]:
         """Analyze spending patterns and trends"""
         insights = []
         
-        # Filter expenses (negative amounts)
-        expenses = df[df['amount'] < 0].copy()
-        expenses['amount'] = expenses['amount'].abs()
-        
         if expenses.empty:
             return insights
         
-        # Group by category and analyze trends
-        category_spending = expenses.groupby('category')['amount'].agg(['sum', 'mean', 'count']).reset_index()
-        
         # Analyze monthly trends
         current_date = pd.Timestamp.now(tz='UTC')
         last_30_days = current_date - pd.Timedelta(days=30)
         last_60_days = current_date - pd.Timedelta(days=60)
         
-        # Ensure date column is timezone-aware
-        if df['date'].dt.tz is None:
-            df['date'] = df['date'].dt.tz_localize('UTC')
+        # Label each expense by window: 0 = last 30 days, 1 = the 30 days before, 2 = older
+        dates = expenses['date'].values
+        amounts = expenses['amount'].values
+        period = np.where(dates >= last_30_days.to_datetime64(), 0,
+                          np.where(dates >= last_60_days.to_datetime64(), 1, 2))
         
-        recent_expenses = expenses[expenses['date'] >= last_30_days]
-        previous_expenses = expenses[(expenses['date'] >= last_60_days) & (expenses['date'] < last_30_days)]
+        recent_mask = period == 0
+        previous_mask = period == 1
         
-        if not recent_expenses.empty and not previous_expenses.empty:
-            recent_total = recent_expenses['amount'].sum()
-            previous_total = previous_expenses['amount'].sum()
+        if recent_mask.any() and previous_mask.any():
+            recent_total = amounts[recent_mask].sum()
+            previous_total = amounts[previous_mask].sum()
             
             if previous_total > 0:
                 change_percent = ((recent_total - previous_total) / previous_total) * 100
@@ -124,66 +174,77 @@ class FinancialAIInsights:
                         }
                     })
         
-        # Analyze category-specific patterns
-        for _, row in category_spending.iterrows():
-            category = row['category']
-            total_spent = row['sum']
-            avg_transaction = row['mean']
-            
-            category_recent = recent_expenses[recent_expenses['category'] == category]['amount'].sum()
-            category_previous = previous_expenses[previous_expenses['category'] == category]['amount'].sum()
-            
-            if category_previous > 0 and category_recent > 0:
-                category_change = ((category_recent - category_previous) / category_previous) * 100
-                
-                if abs(category_change) > 25:
-                    insights.append({
-                        'id': f'category-trend-{category.lower().replace(" ", "-")}',
-                        'type': 'recommendation' if category_change > 0 else 'opportunity',
-                        'title': f'{category} Spending Alert',
-                        'description': f'Your {category.lower()} spending has {"increased" if category_change > 0 else "decreased"} by {abs(category_change):.1f}% this month.',
-                        'impact': 'Medium',
-                        'confidence': 85,
-                        'category': category,
-                        'actionable': True,
-                        'priority': 6,
-                        'metadata': {
-                            'amount': category_recent,
-                            'change': category_change
-                        }
-                    })
+        # Analyze category-specific patterns: sum each window per category code with bincount
+        categories = expenses['category'].cat.categories
+        category_codes = expenses['category'].cat.codes.values.astype(np.int64)
+        known = category_codes >= 0
+        recent_known = recent_mask & known
+        previous_known = previous_mask & known
+        category_recent = np.bincount(category_codes[recent_known], weights=amounts[recent_known],
+                                      minlength=categories.size)
+        category_previous = np.bincount(category_codes[previous_known], weights=amounts[previous_known],
+                                        minlength=categories.size)
+        
+        active = (category_previous > 0) & (category_recent > 0)
+        category_change = np.zeros(categories.size)
+        category_change[active] = (category_recent[active] - category_previous[active]) / category_previous[active] * 100
+        
+        for i in np.flatnonzero(active & (np.abs(category_change) > 25)):
+            category = categories[i]
+            change = category_change[i]
+            insights.append({
+                'id': f'category-trend-{category.lower().replace(" ", "-")}',
+                'type': 'recommendation' if change > 0 else 'opportunity',
+                'title': f'{category} Spending Alert',
+                'description': f'Your {category.lower()} spending has {"increased" if change > 0 else "decreased"} by {abs(change):.1f}% this month.',
+                'impact': 'Medium',
+                'confidence': 85,
+                'category': category,
+                'actionable': True,
+                'priority': 6,
+                'metadata': {
+                    'amount': category_recent[i],
+                    'change': change
+                }
+            })
         
         return insights
     
-    def detect_anomalies(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def detect_anomalies(self, df: pd.DataFrame, expenses: pd.DataFrame, day_keys: np.ndarray,
+                         daily_totals: np.ndarray) -> List[Dict[str, Any]]:
         """Detect unusual spending patterns"""
         insights = []
         
-        expenses = df[df['amount'] < 0].copy()
-        expenses['amount'] = expenses['amount'].abs()
-        
         if len(expenses) < 5:
             return insights
         
         # Daily spending analysis
-        daily_spending = expenses.groupby(expenses['date'].dt.date)['amount'].sum()
-        
-        if len(daily_spending) >= 7:
-            mean_daily = daily_spending.mean()
-            std_daily = daily_spending.std()
+        if daily_totals.size >= 7:
+            median_daily = np.median(daily_totals)
+            deviations = daily_totals - median_daily
+            
+            # Find outlier days with the modified Z-score (median/MAD), which unlike
+            # mean + 2*std is not inflated by the very outliers it is looking for
+            mad = np.median(np.abs(deviations))
+            if mad > 0:
+                z_scores = 0.6745 * deviations / mad
+            else:
+                # Over half the days are identical; scale by the mean absolute deviation instead
+                mean_ad = np.abs(deviations).mean()
+                z_scores = deviations / (1.253314 * mean_ad) if mean_ad > 0 else np.zeros_like(deviations)
             
-            # Find outlier days (spending > mean + 2*std)
-            outliers = daily_spending[daily_spending > mean_daily + 2 * std_daily]
+            outlier_positions = np.flatnonzero(z_scores > 3.5)
             
-            if not outliers.empty:
-                latest_outlier = outliers.iloc[-1]
-                outlier_date = outliers.index[-1]
+            if outlier_positions.size:
+                latest_outlier = daily_totals[outlier_positions[-1]]
+                outlier_date = day_keys[outlier_positions[-1]]
+                deviation_percent = (latest_outlier / median_daily - 1) * 100
                 
                 insights.append({
                     'id': 'anomaly-spending',
                     'type': 'alert',
                     'title': 'Unusual Spending Detected',
-                    'description': f'You spent ${latest_outlier:.2f} on {outlier_date}, which is {((latest_outlier / mean_daily - 1) * 100):.0f}% above your daily average.',
+                    'description': f'You spent ${latest_outlier:.2f} on {outlier_date}, which is {deviation_percent:.0f}% above your typical daily spending.',
                     'impact': 'Medium',
                     'confidence': 90,
                     'category': 'Budget Control',
@@ -192,64 +253,63 @@ class FinancialAIInsights:
                     'metadata': {
                         'amount': latest_outlier,
                         'date': str(outlier_date),
-                        'deviation_percent': (latest_outlier / mean_daily - 1) * 100
+                        'deviation_percent': deviation_percent
                     }
                 })
         
-        # Large transaction detection
-        large_transactions = expenses[expenses['amount'] > expenses['amount'].quantile(0.95)]
+        # Large transaction detection (top 5% of expenses within the last week)
+        amounts = expenses['amount'].values
+        week_ago = (pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=7)).to_datetime64()
+        
+        # Linearly interpolated 95th percentile from an O(n) partition around its two neighbouring ranks
+        position = (amounts.size - 1) * 0.95
+        lower = int(position)
+        upper = min(lower + 1, amounts.size - 1)
+        ranked = np.partition(amounts, (lower, upper))
+        threshold = ranked[lower] + (ranked[upper] - ranked[lower]) * (position - lower)
+        
+        large_mask = amounts > threshold
+        recent_large = expenses.iloc[np.flatnonzero(large_mask & (expenses['date'].values >= week_ago))]
         
-        if not large_transactions.empty:
-            current_time = pd.Timestamp.now(tz='UTC')
-            week_ago = current_time - pd.Timedelta(days=7)
-            recent_large = large_transactions[large_transactions['date'] >= week_ago]
+        if len(recent_large):
+            largest = recent_large.iloc[recent_large['amount'].values.argmax()]
             
-            if not recent_large.empty:
-                largest = recent_large.iloc[recent_large['amount'].idxmax()]
-                
-                insights.append({
-                    'id': 'large-transaction',
-                    'type': 'alert',
-                    'title': 'Large Transaction Alert',
-                    'description': f'Large expense of ${largest["amount"]:.2f} detected at {largest["merchant"]} in {largest["category"]}.',
-                    'impact': 'Medium',
-                    'confidence': 100,
-                    'category': 'Transaction Monitoring',
-                    'actionable': True,
-                    'priority': 7,
-                    'metadata': {
-                        'amount': largest['amount'],
-                        'merchant': largest['merchant'],
-                        'category': largest['category']
-                    }
-                })
+            insights.append({
+                'id': 'large-transaction',
+                'type': 'alert',
+                'title': 'Large Transaction Alert',
+                'description': f'Large expense of ${largest["amount"]:.2f} detected at {largest["merchant"]} in {largest["category"]}.',
+                'impact': 'Medium',
+                'confidence': 100,
+                'category': 'Transaction Monitoring',
+                'actionable': True,
+                'priority': 7,
+                'metadata': {
+                    'amount': largest['amount'],
+                    'merchant': largest['merchant'],
+                    'category': largest['category']
+                }
+            })
         
         return insights
     
-    def predict_future_spending(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def predict_future_spending(self, df: pd.DataFrame, expenses: pd.DataFrame, monthly_totals: np.ndarray) -> List[Dict[str, Any]]:
         """Predict future spending based on historical patterns"""
         insights = []
         
-        expenses = df[df['amount'] < 0].copy()
-        expenses['amount'] = expenses['amount'].abs()
-        
         if expenses.empty:
             return insights
         
         # Monthly spending prediction
-        # Convert to timezone-naive datetime to avoid warnings
-        expenses_naive = expenses.copy()
-        expenses_naive['date'] = pd.to_datetime(expenses_naive['date']).dt.tz_localize(None)
-        monthly_spending = expenses_naive.groupby(expenses_naive['date'].dt.to_period('M'))['amount'].sum()
-        
-        if len(monthly_spending) >= 2:
+        if monthly_totals.size >= 2:
             # Simple linear trend calculation
-            months = range(len(monthly_spending))
-            amounts = monthly_spending.values
+            amounts = monthly_totals
             
             if len(amounts) >= 3:
-                # Calculate trend using simple linear regression
-                trend = np.polyfit(months, amounts, 1)[0]
+                # Least-squares slope over evenly spaced months, in closed form
+                months = np.arange(amounts.size, dtype=np.float64)
+                month_offsets = months - months.mean()
+                trend = (month_offsets * (amounts - amounts.mean())).sum() / (month_offsets ** 2).sum()
                 last_month = amounts[-1]
                 predicted_next = last_month + trend
                 
@@ -273,19 +333,15 @@ class FinancialAIInsights:
         
         return insights
     
-    def identify_savings_opportunities(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def identify_savings_opportunities(self, df: pd.DataFrame, expenses: pd.DataFrame, cat_gb: pd.core.groupby.DataFrameGroupBy,
+                                       recurring_charges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Identify opportunities to save money"""
         insights = []
         
-        expenses = df[df['amount'] < 0].copy()
-        expenses['amount'] = expenses['amount'].abs()
-        
         if expenses.empty:
             return insights
         
         # Subscription analysis
-        recurring_charges = self.find_recurring_charges(expenses)
-        
         if recurring_charges:
             total_subscriptions = sum(charge['amount'] for charge in recurring_charges)
             
@@ -307,7 +363,7 @@ class FinancialAIInsights:
             })
         
         # Category optimization
-        category_spending = expenses.groupby('category')['amount'].sum().sort_values(ascending=False)
+        category_spending = cat_gb['amount'].sum().sort_values(ascending=False)
         
         if not category_spending.empty:
             top_category = category_spending.index[0]
@@ -332,13 +388,10 @@ class FinancialAIInsights:
         
         return insights
     
-    def analyze_cash_flow(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def analyze_cash_flow(self, income: float, expenses: float) -> List[Dict[str, Any]]:
         """Analyze cash flow patterns"""
         insights = []
         
-        income = df[df['amount'] > 0]['amount'].sum()
-        expenses = df[df['amount'] < 0]['amount'].abs().sum()
-        
         if income > 0:
             savings_rate = ((income - expenses) / income) * 100
             
@@ -379,86 +432,110 @@ class FinancialAIInsights:
         
         return insights
     
-    def detect_recurring_charges(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def detect_recurring_charges(self, df: pd.DataFrame, expenses: pd.DataFrame,
+                                 recurring_charges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Detect new or changed recurring charges"""
         insights = []
         
-        expenses = df[df['amount'] < 0].copy()
-        expenses['amount'] = expenses['amount'].abs()
-        
-        recurring_charges = self.find_recurring_charges(expenses)
+        if not recurring_charges:
+            return insights
         
         # Check for new recurring charges (appeared in last 30 days)
-        recent_date = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=30)
-        
-        for charge in recurring_charges:
-            # Check if this charge started recently
-            charge_transactions = expenses[
-                (expenses['merchant'] == charge['merchant']) & 
-                (abs(expenses['amount'] - charge['amount']) < 1)
-            ]
-            
-            if not charge_transactions.empty:
-                first_occurrence = charge_transactions['date'].min()
-                
-                if first_occurrence >= recent_date:
-                    insights.append({
-                        'id': f'new-recurring-{charge["merchant"].lower().replace(" ", "-")}',
-                        'type': 'alert',
-                        'title': 'New Recurring Charge',
-                        'description': f'New recurring charge of ${charge["amount"]:.2f} from {charge["merchant"]} detected. Verify this is authorized.',
-                        'impact': 'Medium',
-                        'confidence': 85,
-                        'category': 'Account Monitoring',
-                        'actionable': True,
-                        'priority': 8,
-                        'metadata': {
-                            'amount': charge['amount'],
-                            'merchant': charge['merchant'],
-                            'first_seen': str(first_occurrence.date())
-                        }
-                    })
+        recent_date = (pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=30)).to_datetime64()
+        
+        # Match each charge against the dated expenses at its merchant: same merchant, amount within $1.
+        # Candidates are sorted by one integer key (merchant code, then amount rank), so each charge's matches
+        # form a contiguous slice found by binary search and memory stays linear in the number of candidates.
+        charge_codes = expenses['merchant'].cat.categories.get_indexer(
+            [charge['merchant'] for charge in recurring_charges]
+        ).astype(np.int64)
+        charge_amounts = np.array([charge['amount'] for charge in recurring_charges], dtype=np.float64)
+        expense_codes = expenses['merchant'].cat.codes.values.astype(np.int64)
+        dates = expenses['date'].values
+        candidates = np.flatnonzero(np.isin(expense_codes, charge_codes) & ~np.isnat(dates))
+        levels, ranks = np.unique(expenses['amount'].values[candidates], return_inverse=True)
+        keys = expense_codes[candidates] * levels.size + ranks
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        dates = dates[candidates][order]
+        
+        # Slice bounds: the first amount above charge - $1 and the first at or above charge + $1
+        segments = charge_codes * levels.size
+        starts = np.searchsorted(keys, segments + np.searchsorted(levels, charge_amounts - 1, side='right'))
+        ends = np.searchsorted(keys, segments + np.searchsorted(levels, charge_amounts + 1, side='left'))
+        
+        # First occurrence of each charge: the earliest date in its slice. reduceat reads [start, end) pairs;
+        # the padding keeps an end at the array length in range, and empty slices are masked out afterwards.
+        never = np.datetime64(np.iinfo(np.int64).max, 'ns')
+        first_seen = np.minimum.reduceat(np.append(dates, never), np.column_stack((starts, ends)).ravel())[::2]
+        first_seen[starts >= ends] = never
+        
+        for i in np.flatnonzero((first_seen >= recent_date) & (first_seen != never)):
+            charge = recurring_charges[i]
+            insights.append({
+                'id': f'new-recurring-{charge["merchant"].lower().replace(" ", "-")}',
+                'type': 'alert',
+                'title': 'New Recurring Charge',
+                'description': f'New recurring charge of ${charge["amount"]:.2f} from {charge["merchant"]} detected. Verify this is authorized.',
+                'impact': 'Medium',
+                'confidence': 85,
+                'category': 'Account Monitoring',
+                'actionable': True,
+                'priority': 8,
+                'metadata': {
+                    'amount': charge['amount'],
+                    'merchant': charge['merchant'],
+                    'first_seen': str(first_seen[i].astype('datetime64[D]'))
+                }
+            })
         
         return insights
     
-    def find_recurring_charges(self, expenses: pd.DataFrame) -> List[Dict[str, Any]]:
+    def find_recurring_charges(self, expenses: pd.DataFrame, expense_days: np.ndarray) -> List[Dict[str, Any]]:
         """Find recurring charges in transaction data"""
         recurring = []
         
-        # Group by merchant and amount
-        grouped = expenses.groupby(['merchant', expenses['amount'].round(2)])
-        
-        for (merchant, amount), group in grouped:
-            if len(group) >= 2:  # At least 2 occurrences
-                # Check if transactions are roughly monthly
-                dates = sorted(group['date'].dt.date)
-                if len(dates) >= 2:
-                    intervals = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
-                    avg_interval = np.mean(intervals)
-                    
-                    # Consider as recurring if interval is between 25-35 days (roughly monthly)
-                    if 20 <= avg_interval <= 40:
-                        recurring.append({
-                            'merchant': merchant,
-                            'amount': amount,
-                            'frequency': len(group),
-                            'avg_interval_days': avg_interval
-                        })
+        # Group by merchant and amount: combine the merchant codes with factorized amounts
+        merchants = expenses['merchant'].cat.categories
+        merchant_codes = expenses['merchant'].cat.codes.values.astype(np.int64)
+        amount_codes, amounts = pd.factorize(np.round(expenses['amount'].values, 2), sort=True)
+        known = (merchant_codes >= 0) & ~np.isnat(expense_days)  # Undated rows have no interval to contribute
+        group_codes, groups = pd.factorize(merchant_codes[known] * amounts.size + amount_codes[known], sort=True)
+        days = expense_days[known].astype(np.int64)
+        
+        # The gaps between a group's sorted dates sum to (last - first), so the mean
+        # interval only needs each group's size and first/last day
+        counts = np.bincount(group_codes, minlength=groups.size)
+        first_day = np.full(groups.size, np.iinfo(np.int64).max)
+        last_day = np.full(groups.size, np.iinfo(np.int64).min)
+        np.minimum.at(first_day, group_codes, days)
+        np.maximum.at(last_day, group_codes, days)
+        
+        repeated = counts >= 2  # At least 2 occurrences
+        avg_intervals = np.zeros(groups.size)
+        avg_intervals[repeated] = (last_day[repeated] - first_day[repeated]) / (counts[repeated] - 1)
+        
+        # Consider as recurring if interval is between 20-40 days (roughly monthly)
+        for i in np.flatnonzero(repeated & (avg_intervals >= 20) & (avg_intervals <= 40)):
+            recurring.append({
+                'merchant': merchants[groups[i] // amounts.size],
+                'amount': amounts[groups[i] % amounts.size],
+                'frequency': int(counts[i]),
+                'avg_interval_days': avg_intervals[i]
+            })
         
         return recurring
     
-    def calculate_health_score(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def calculate_health_score(self, expense_amounts: np.ndarray, daily_totals: np.ndarray,
+                               monthly_totals: np.ndarray, income: float, total_expenses: float) -> Dict[str, Any]:
         """Calculate comprehensive financial health score"""
         
-        income = df[df['amount'] > 0]['amount'].sum()
-        expenses = df[df['amount'] < 0]['amount'].abs().sum()
-        
-        # Component scores (0-100)
-        spending_control = self._calculate_spending_control_score(df)
-        savings_rate = self._calculate_savings_rate_score(income, expenses)
-        budget_adherence = self._calculate_budget_adherence_score(df)
-        financial_stability = self._calculate_stability_score(df)
-        cash_flow_health = self._calculate_cash_flow_score(income, expenses)
+        # Component scores (0-100), as built-in floats so the fixed-schema score dict carries no numpy scalars
+        spending_control = float(self._calculate_spending_control_score(expense_amounts))
+        savings_rate = float(self._calculate_savings_rate_score(income, total_expenses))
+        budget_adherence = float(self._calculate_budget_adherence_score(expense_amounts.size, daily_totals))
+        financial_stability = float(self._calculate_stability_score(monthly_totals))
+        cash_flow_health = float(self._calculate_cash_flow_score(income, total_expenses))
         
         # Overall score (weighted average)
         overall = (
@@ -487,15 +564,14 @@ class FinancialAIInsights:
             })
         }
     
-    def _calculate_spending_control_score(self, df: pd.DataFrame) -> float:
+    def _calculate_spending_control_score(self, expense_amounts: np.ndarray) -> float:
         """Calculate spending control score based on volatility"""
-        expenses = df[df['amount'] < 0]['amount'].abs()
-        
-        if len(expenses) < 3:
+        if expense_amounts.size < 3:
             return 75  # Default score for insufficient data
         
         # Calculate coefficient of variation
-        cv = expenses.std() / expenses.mean() if expenses.mean() > 0 else 1
+        mean = expense_amounts.mean()
+        cv = expense_amounts.std(ddof=1) / mean if mean > 0 else 1
         
         # Convert to score (lower volatility = higher score)
         score = max(0, 100 - cv * 50)
@@ -512,36 +588,30 @@ class FinancialAIInsights:
         score = min(100, max(0, savings_rate * 5))
         return score
     
-    def _calculate_budget_adherence_score(self, df: pd.DataFrame) -> float:
+    def _calculate_budget_adherence_score(self, expense_count: int, daily_spending: np.ndarray) -> float:
         """Calculate budget adherence score"""
-        expenses = df[df['amount'] < 0]['amount'].abs()
-        
-        if len(expenses) < 7:
+        if expense_count < 7:
             return 70  # Default score for insufficient data
         
         # Calculate daily spending consistency
-        daily_spending = expenses.groupby(df[df['amount'] < 0]['date'].dt.date).sum()
-        cv = daily_spending.std() / daily_spending.mean() if daily_spending.mean() > 0 else 1
+        if daily_spending.size < 2:
+            return 0  # Everything on a single day; no day-to-day consistency to measure
+        
+        mean = daily_spending.mean()
+        cv = daily_spending.std(ddof=1) / mean if mean > 0 else 1
         
         # Convert to score (more consistent = higher score)
         score = max(0, 100 - cv * 30)
         return min(100, score)
     
-    def _calculate_stability_score(self, df: pd.DataFrame) -> float:
+    def _calculate_stability_score(self, monthly_expenses: np.ndarray) -> float:
         """Calculate financial stability score"""
-        # Convert to timezone-naive datetime to avoid warnings
-        df_naive = df.copy()
-        df_naive['date'] = pd.to_datetime(df_naive['date']).dt.tz_localize(None)
-        
-        monthly_expenses = df_naive[df_naive['amount'] < 0].groupby(
-            df_naive[df_naive['amount'] < 0]['date'].dt.to_period('M')
-        )['amount'].sum().abs()
-        
-        if len(monthly_expenses) < 2:
+        if monthly_expenses.size < 2:
             return 70  # Default score
         
         # Calculate month-to-month consistency
-        cv = monthly_expenses.std() / monthly_expenses.mean() if monthly_expenses.mean() > 0 else 1
+        mean = monthly_expenses.mean()
+        cv = monthly_expenses.std(ddof=1) / mean if mean > 0 else 1
         
         # Convert to score
         score = max(0, 100 - cv * 40)
@@ -644,32 +714,106 @@ class FinancialAIInsights:
             }
         }
 
+def engine_version() -> str:
+    """Identify the engine source on disk by path and modification time, to spot results or processes from older code"""
+    return f'{os.path.abspath(__file__)}:{os.stat(__file__).st_mtime_ns}'
+
+_engine = None
+
+def get_engine() -> FinancialAIInsights:
+    """Shared FinancialAIInsights instance, created on first use (the engine keeps no per-analysis state)"""
+    global _engine
+    if _engine is None:
+        _engine = FinancialAIInsights()
+    return _engine
+
+def iter_result_sections(result: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield an analysis result as (section, payload) pairs so a reporter can print and drop each piece:
+    ('success', bool), ('error', str) on failure, ('healthScore', dict), then one ('insight', dict) per insight
+    """
+    yield 'success', result['success']
+    if not result['success']:
+        yield 'error', result.get('error', 'Unknown error')
+    yield 'healthScore', result['healthScore']
+    for insight in result['insights']:
+        yield 'insight', insight
+
+def loads_json(raw: Union[bytes, memoryview, str]) -> Any:
+    """Parse JSON bytes, a bytes buffer or text, tolerating a UTF-8 BOM (Windows files)"""
+    bom = '\ufeff' if isinstance(raw, str) else codecs.BOM_UTF8
+    if raw[:len(bom)] == bom:
+        raw = raw[len(bom):]
+    
+    if orjson is None:
+        return json.loads(raw.tobytes() if isinstance(raw, memoryview) else raw)
+    return orjson.loads(raw)
+
+def load_json_file(file_path: str) -> Any:
+    """Read and parse a JSON file"""
+    with open(file_path, 'rb') as f:
+        return loads_json(f.read())
+
+def dump_json(data: Any) -> bytes:
+    """Serialize a result to UTF-8 JSON bytes, converting numpy values along the way"""
+    if orjson is None:
+        return json.dumps(data, default=str).encode()
+    
+    return orjson.dumps(data, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC)
+
+def write_json(data: Any) -> None:
+    """Write one JSON line straight to the stdout byte stream, skipping the text layer's re-encoding"""
+    sys.stdout.buffer.write(dump_json(data) + b'\n')
+    sys.stdout.buffer.flush()
+
+def error_response(file_path: str, error: Exception) -> Dict[str, str]:
+    """Describe a failure to load or analyze a transaction data file"""
+    if isinstance(error, FileNotFoundError):
+        return {'error': f'Transaction data file not found: {file_path}'}
+    if isinstance(error, json.JSONDecodeError):
+        return {'error': f'Invalid JSON in transaction data file: {error}'}
+    return {'error': f'Error processing transaction data: {error}'}
+
+def serve():
+    """Persistent worker: read one transaction data file path per stdin line, answer each with one JSON line"""
+    # Pay the numpy/pandas import once, before the first request arrives
+    _import_numeric_stack()
+    ai_insights = get_engine()
+    
+    for line in sys.stdin:
+        file_path = line.strip()
+        if not file_path:
+            continue
+        
+        try:
+            result = ai_insights.analyze_transactions(load_json_file(file_path))
+        except Exception as e:
+            result = error_response(file_path, e)
+        
+        write_json(result)
+
 def main():
     """Main function to process transaction data and return insights"""
+    if sys.argv[1:] == ['--serve']:
+        serve()
+        return
+    
     if len(sys.argv) != 2:
-        print(json.dumps({'error': 'Transaction data file path required as argument'}))
+        write_json({'error': 'Transaction data file path required as argument'})
         sys.exit(1)
     
     file_path = sys.argv[1]
     
     try:
-        # Read transaction data from file (handle BOM for Windows files)
-        with open(file_path, 'r', encoding='utf-8-sig') as f:
-            transaction_data = json.load(f)
+        # Read transaction data from file
+        transaction_data = load_json_file(file_path)
         
-        ai_insights = FinancialAIInsights()
-        result = ai_insights.analyze_transactions(transaction_data)
+        result = get_engine().analyze_transactions(transaction_data)
         
-        print(json.dumps(result, default=str))
+        write_json(result)
         
-    except FileNotFoundError:
-        print(json.dumps({'error': f'Transaction data file not found: {file_path}'}))
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(json.dumps({'error': f'Invalid JSON in transaction data file: {e}'}))
-        sys.exit(1)
     except Exception as e:
-        print(json.dumps({'error': f'Error processing transaction data: {e}'}))
+        write_json(error_response(file_path, e))
         sys.exit(1)
 
 if __name__ == '__main__':
@@ -1,4 +1,5 @@
-import { exec } from 'child_process';
+import { exec, spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import { createInterface } from 'readline';
 import { promisify } from 'util';
 import { writeFileSync, unlinkSync } from 'fs';
 import path from 'path';
@@ -55,8 +56,23 @@ export interface Transaction {
   merchant: string;
 }
 
+// Transaction fields ai_insights_engine.py actually uses
+const ENGINE_TRANSACTION_FIELDS: (keyof Transaction)[] = ['amount', 'date', 'merchant', 'category'];
+
+interface PendingRequest {
+  resolve: (output: string) => void;
+  reject: (error: Error) => void;
+}
+
+// One engine process and the requests queued on it; the queue dies with the process
+interface EngineWorker {
+  child: ChildProcessWithoutNullStreams;
+  pending: PendingRequest[];
+}
+
 export class IndependentAIInsightsService {
   private pythonScriptPath: string;
+  private worker: EngineWorker | null = null;
 
   constructor() {
     this.pythonScriptPath = path.join(process.cwd(), 'ai_insights_engine.py');
@@ -77,22 +93,20 @@ export class IndependentAIInsightsService {
       const tempFilePath = path.join(process.cwd(), tempFileName);
       
       try {
-        // Write transaction data to temporary file (UTF-8 without BOM)
-        writeFileSync(tempFilePath, JSON.stringify(transactions, null, 2), 'utf8');
+        // Write transaction data to temporary file (UTF-8 without BOM), compact and with only the
+        // fields the engine reads, so there is less JSON to encode here and parse in Python
+        writeFileSync(tempFilePath, JSON.stringify(transactions, ENGINE_TRANSACTION_FIELDS), 'utf8');
         
-        // Execute Python script with file path instead of inline data
-        const command = `python "${this.pythonScriptPath}" "${tempFilePath}"`;
-        const { stdout, stderr } = await execAsync(command, {
-          maxBuffer: 1024 * 1024 * 10, // 10MB buffer
-          timeout: 30000 // 30 second timeout
-        });
-
-        if (stderr) {
-          console.warn('Python script warning:', stderr);
-        }
+        // Hand the file path to the long-lived Python worker
+        const stdout = await this.runEngine(tempFilePath);
 
         // Parse the result
         const result = JSON.parse(stdout) as AIInsightsResponse;
+
+        // The worker reports unreadable input as a bare { error } line instead of exiting
+        if (!result.insights) {
+          throw new Error(result.error || 'AI insights engine returned no insights');
+        }
         
         return {
           ...result,
@@ -120,6 +134,70 @@ export class IndependentAIInsightsService {
     }
   }
 
+  /**
+   * Start the Python engine in --serve mode, or reuse the one already running.
+   * Keeping it alive saves the interpreter start-up and numpy/pandas import on every request.
+   */
+  private getWorker(): EngineWorker {
+    if (this.worker) {
+      return this.worker;
+    }
+
+    const child = spawn('python', [this.pythonScriptPath, '--serve']);
+    const worker: EngineWorker = { child, pending: [] };
+
+    // The worker answers requests in order, one JSON line each. Lines still buffered
+    // from a worker that has been replaced must never resolve requests on its successor.
+    createInterface({ input: child.stdout }).on('line', line => {
+      if (this.worker === worker) {
+        worker.pending.shift()?.resolve(line);
+      }
+    });
+
+    child.stderr.on('data', chunk => {
+      console.warn('Python script warning:', chunk.toString());
+    });
+
+    const fail = (error: Error) => {
+      if (this.worker === worker) {
+        this.worker = null;
+      }
+      worker.pending.splice(0).forEach(request => request.reject(error));
+    };
+
+    child.on('error', fail);
+    child.stdin.on('error', fail);
+    child.on('exit', code => fail(new Error(`AI insights engine exited with code ${code}`)));
+
+    this.worker = worker;
+    return worker;
+  }
+
+  /**
+   * Send one transaction data file to the Python worker and wait for its JSON output
+   */
+  private runEngine(filePath: string): Promise<string> {
+    return new Promise((resolve, reject) => {
+      const worker = this.getWorker();
+
+      // A stuck worker is killed; the exit handler rejects everything queued on it
+      const timer = setTimeout(() => worker.child.kill(), 30000); // 30 second timeout
+
+      worker.pending.push({
+        resolve: output => {
+          clearTimeout(timer);
+          resolve(output);
+        },
+        reject: error => {
+          clearTimeout(timer);
+          reject(error);
+        }
+      });
+
+      worker.child.stdin.write(filePath + '\n');
+    });
+  }
+
   /**
    * Calculate financial health score using our Python engine
    */
@@ -219,7 +297,7 @@ export class IndependentAIInsightsService {
    */
   public async installDependencies(): Promise<{success: boolean, output: string}> {
     try {
-      const { stdout, stderr } = await execAsync('pip install numpy pandas');
+      const { stdout, stderr } = await execAsync('pip install numpy pandas orjson');
       return {
         success: true,
         output: stdout + stderr